@@ -1,8 +1,22 @@
+with by_key as (
+
 select 
   	date_part('year', fecha_del_contrato) as año_del_contrato,
-  	adjudicador,
+  	adjudicador_id,
     sum(importe_total) as importe_total,
     count(*) as numero_contratos
     
-from refined_contracts
-group by 1,2
\ No newline at end of file
+from fact_contracts
+group by 1,2
+
+)
+
+select
+    año_del_contrato,
+    adjudicador,
+    sum(importe_total) as importe_total,
+    sum(numero_contratos) as numero_contratos
+
+from by_key
+left join dim_adjudicador using (adjudicador_id)
+group by 1,2
@@ -0,0 +1,14 @@
+-- One row per contract with its title, awardee and contracting authority lower-cased and unaccented in `texto`,
+-- so the browser can match user input with ILIKE regardless of case and accents.
+select distinct on (contract_id)
+  contract_id,
+  strip_accents(lower(concat_ws(' ', titulo_del_contrato, adjudicatario, adjudicador))) as texto,
+  titulo_del_contrato,
+  adjudicatario,
+  nif_del_adjudicatario,
+  adjudicador,
+  -- Fixes issue with dates
+  fecha_del_contrato + INTERVAL 1 DAY as fecha_del_contrato,
+  importe_total
+
+from refined_contracts
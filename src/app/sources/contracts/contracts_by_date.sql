@@ -3,10 +3,20 @@ select
   fecha_del_contrato + INTERVAL 1 DAY as fecha_del_contrato,
   tipo_de_publicacion,
   tipo_de_contrato,
-  count(*) as numero_contratos,
-  sum(importe_total) as importe_total
+  numero_contratos,
+  importe_total
 
-from refined_contracts 
-where fecha_del_contrato is not null 
-  and fecha_del_contrato < now()
-group by 1,2,3
+from (
+  select
+    fecha_del_contrato,
+    tipo_de_publicacion_id,
+    tipo_de_contrato,
+    count(*) as numero_contratos,
+    sum(importe_total) as importe_total
+
+  from fact_contracts 
+  where fecha_del_contrato is not null 
+    and fecha_del_contrato < now()
+  group by 1,2,3
+)
+left join dim_tipo_de_publicacion using (tipo_de_publicacion_id)
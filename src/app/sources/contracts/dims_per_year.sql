@@ -1,9 +1,19 @@
 select 
-    date_part('year', fecha_del_contrato) as año_del_contrato,
+    año_del_contrato,
     tipo_de_publicacion,
     tipo_de_contrato,
-    sum(importe_total) as importe_total,
-    count(*) as numero_contratos
-    
-from refined_contracts
-group by 1,2,3
\ No newline at end of file
+    importe_total,
+    numero_contratos
+
+from (
+  select
+      date_part('year', fecha_del_contrato) as año_del_contrato,
+      tipo_de_publicacion_id,
+      tipo_de_contrato,
+      sum(importe_total) as importe_total,
+      count(*) as numero_contratos
+      
+  from fact_contracts
+  group by 1,2,3
+)
+left join dim_tipo_de_publicacion using (tipo_de_publicacion_id)
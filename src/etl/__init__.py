@@ -1,5 +1,11 @@
 # This file makes src/etl a Python package 
 
-from .extract import backfill_by_month, download_csv
+import importlib
 
-__all__ = ["download_csv", "backfill_by_month"] 
\ No newline at end of file
+__all__ = ["download_csv", "backfill_by_month"]
+
+def __getattr__(name):
+    # The extract modules import Playwright, so they are only loaded on first access
+    if name in __all__:
+        return importlib.import_module(f".extract.{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,6 @@
+# Allows running the pipeline CLI with `python -m src.etl`
+
+from src.etl.cli import main
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Single entry point for the pipeline: `python -m src.etl <command>`.
+
+Each command imports only the modules it needs, so DuckDB steps do not pay for Playwright
+and `extract` does not pay for DuckDB. `run` chains every stage in one process over a single
+DuckDB connection, and all commands report how long each stage took to import and to run.
+"""
+import argparse
+import importlib
+import logging
+import os
+import subprocess
+import sys
+import time
+
+from src.etl.config import OUTPUT_DIR, DATABASE_NAME
+from src.etl.transform.options import add_refined_arguments
+
+DATABASE_PATH = os.path.join(OUTPUT_DIR, DATABASE_NAME)
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../app"))
+
+# Order in which stages are reported, regardless of which one first imports a shared module
+STAGES = ("extract", "connect", "raw", "refined", "search index", "sync", "bench")
+
+class StageTimings:
+    """Records import and run time per pipeline stage and prints them as a table."""
+
+    def __init__(self):
+        self.stages = {}
+        self.current_stage = None
+
+    def import_module(self, stage, module_name):
+        self.current_stage = stage
+        start = time.perf_counter()
+        module = importlib.import_module(module_name)
+        self.stages.setdefault(stage, [0.0, 0.0])[0] += time.perf_counter() - start
+        return module
+
+    def run(self, stage, func, *args, **kwargs):
+        self.current_stage = stage
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        self.stages.setdefault(stage, [0.0, 0.0])[1] += time.perf_counter() - start
+        return result
+
+    def report(self):
+        if not self.stages:
+            return
+        print(f"\n{'stage':<15} {'import':>9} {'run':>9}")
+        for stage in sorted(self.stages, key=STAGES.index):
+            import_seconds, run_seconds = self.stages[stage]
+            print(f"{stage:<15} {import_seconds:>8.2f}s {run_seconds:>8.2f}s")
+        total_import = sum(seconds[0] for seconds in self.stages.values())
+        total_run = sum(seconds[1] for seconds in self.stages.values())
+        print(f"{'total':<15} {total_import:>8.2f}s {total_run:>8.2f}s")
+
+def _extract(args, timings):
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    backfill_by_month = timings.import_module("extract", "src.etl.extract.backfill_by_month")
+    timings.run("extract", backfill_by_month.run_backfill, args.start_date, args.end_date, args.delay, args.retries)
+
+def _connect(args, timings, read_only=False):
+    duckdb = timings.import_module("connect", "duckdb")
+    if not read_only:
+        os.makedirs(OUTPUT_DIR, exist_ok=True)
+    con = timings.run("connect", duckdb.connect, database=DATABASE_PATH, read_only=read_only)
+    print(f"Successfully connected to local DuckDB database at {DATABASE_PATH}.")
+    return con
+
+def _transform_stages(con, args, timings):
+    """Runs raw -> refined -> search index on an already open connection."""
+    raw_model = timings.import_module("raw", "src.etl.transform.create_raw_contracts_model")
+    timings.run("raw", raw_model.create_raw_contracts_view, con)
+
+    refined_model = timings.import_module("refined", "src.etl.transform.create_refined_contracts_model")
+    timings.run("refined", refined_model.build_refined_contracts_model, con, args.chunk_by, args.files_per_chunk)
+
+    if not args.skip_search_index:
+        search_index = timings.import_module("search index", "src.etl.transform.create_search_index")
+        try:
+            timings.run("search index", search_index.load_search_tokenizer, con)
+        except search_index.SearchTokenizerUnavailableError as e:
+            # The refined model is already built; an offline host should not fail the whole transform
+            print(f"Skipping search index: {e}")
+            return
+        timings.run("search index", search_index.refresh_search_index, con)
+
+def _transform(args, timings):
+    con = _connect(args, timings)
+    try:
+        refined_model = timings.import_module("refined", "src.etl.transform.create_refined_contracts_model")
+        refined_model.configure_session(con, args.memory_limit, args.threads, args.temp_directory)
+        _transform_stages(con, args, timings)
+    finally:
+        con.close()
+
+def _sync(args, timings):
+    """Refreshes the Evidence app's copy of the data sources (`npm run sources`)."""
+    completed = timings.run("sync", subprocess.run, ["npm", "run", "sources"], cwd=APP_DIR)
+    if completed.returncode != 0:
+        raise RuntimeError(f"'npm run sources' exited with code {completed.returncode}")
+
+def _bench(args, timings):
+    search = timings.import_module("bench", "src.etl.search")
+    con = _connect(args, timings, read_only=True)
+    try:
+        timings.run("bench", search.load_search_tokenizer, con)
+        timings.run("bench", search.benchmark, con, [args.query] if args.query else search.BENCHMARK_QUERIES, args.repeat)
+    finally:
+        con.close()
+
+def _run(args, timings):
+    if args.start_date and args.end_date:
+        _extract(args, timings)
+    else:
+        print("No --start-date/--end-date given, skipping extract.")
+    _transform(args, timings)
+    if args.sync:
+        _sync(args, timings)
+
+def _add_extract_arguments(parser, optional=False):
+    if optional:
+        parser.add_argument("--start-date", help="Start date for the extract stage (format: YYYY-MM-DD); extract is skipped if omitted")
+        parser.add_argument("--end-date", help="End date for the extract stage (format: YYYY-MM-DD)")
+    else:
+        parser.add_argument("start_date", help="Global start date for backfill (format: YYYY-MM-DD)")
+        parser.add_argument("end_date", help="Global end date for backfill (format: YYYY-MM-DD)")
+    parser.add_argument("--delay", type=int, default=0, help="Optional delay in seconds between download attempts (default: 0)")
+    parser.add_argument("--retries", type=int, default=3, help="Number of retries for a download period if a timeout occurs (default: 3)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Enable verbose (DEBUG level) logging")
+
+def _add_transform_arguments(parser):
+    add_refined_arguments(parser)
+    parser.add_argument("--skip-search-index", action="store_true", help="Do not refresh the search index after the refined model")
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m src.etl", description="Contratos de Madrid data pipeline.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    extract_parser = subparsers.add_parser("extract", help="Download contract CSVs month by month")
+    _add_extract_arguments(extract_parser)
+    extract_parser.set_defaults(handler=_extract)
+
+    transform_parser = subparsers.add_parser("transform", help="Build the raw and refined models and the search index over one DuckDB connection")
+    _add_transform_arguments(transform_parser)
+    transform_parser.set_defaults(handler=_transform)
+
+    sync_parser = subparsers.add_parser("sync", help="Refresh the Evidence app data sources (npm run sources)")
+    sync_parser.set_defaults(handler=_sync)
+
+    bench_parser = subparsers.add_parser("bench", help="Benchmark the search index against ILIKE scans")
+    bench_parser.add_argument("query", nargs="?", help="Benchmark a single query instead of the default set")
+    bench_parser.add_argument("--repeat", type=int, default=10, help="Runs per query (default: 10)")
+    bench_parser.set_defaults(handler=_bench)
+
+    run_parser = subparsers.add_parser("run", help="Run extract -> raw -> refined -> search index in one process")
+    _add_extract_arguments(run_parser, optional=True)
+    _add_transform_arguments(run_parser)
+    run_parser.add_argument("--sync", action="store_true", help="Refresh the Evidence app data sources at the end")
+    run_parser.set_defaults(handler=_run)
+
+    return parser
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == "run" and bool(args.start_date) != bool(args.end_date):
+        parser.error("--start-date and --end-date must be given together")
+    timings = StageTimings()
+    try:
+        args.handler(args, timings)
+    except Exception as e:
+        print(f"Stage '{timings.current_stage}' failed: {e}")
+        timings.report()
+        sys.exit(1)
+    timings.report()
+
+if __name__ == "__main__":
+    main()
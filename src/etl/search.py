@@ -0,0 +1,115 @@
+import argparse
+import duckdb
+import os
+import statistics
+import time
+from src.etl.config import OUTPUT_DIR, DATABASE_NAME
+from src.etl.transform.create_search_index import load_search_tokenizer, SearchTokenizerUnavailableError
+
+DATABASE_PATH = os.path.join(OUTPUT_DIR, DATABASE_NAME)
+
+BENCHMARK_QUERIES = [
+    "limpieza",
+    "suministro material sanitario",
+    "obras de reforma colegio",
+    "mantenimiento ascensores",
+    "servicio de educación",
+]
+
+def search_contracts(con, query: str, limit: int = 20, match_all: bool = True) -> list[tuple]:
+    """
+    Searches contracts by keyword over title, awardee and contracting authority, ranked by BM25.
+    With match_all, only contracts containing every query term are returned.
+    Returns (contract_id, score, titulo_del_contrato, adjudicatario, adjudicador, fecha_del_contrato, importe_total) tuples.
+    Expects load_search_tokenizer to have been called on the connection.
+    """
+    terms = sorted(set(con.execute("SELECT search_tokenize(?)", [query]).fetchone()[0] or []))
+    if not terms:
+        return []
+
+    # One placeholder per term keeps the filter a constant IN list that DuckDB can push into the postings scan
+    placeholders = ", ".join("?" for _ in terms)
+    having = f"HAVING COUNT(*) = {len(terms)}" if match_all else ""
+    matches = con.execute(f"""
+        SELECT contract_id, SUM(peso) AS score
+        FROM contracts.main.search_term_weights
+        WHERE term IN ({placeholders})
+        GROUP BY contract_id
+        {having}
+        ORDER BY score DESC
+        LIMIT ?
+    """, terms + [limit]).fetchall()
+    if not matches:
+        return []
+
+    # Fetch the few matching contracts by id rather than joining the whole of refined_contracts
+    scores = dict(matches)
+    placeholders = ", ".join("?" for _ in scores)
+    rows = con.execute(f"""
+        SELECT contract_id, titulo_del_contrato, adjudicatario, adjudicador, fecha_del_contrato, importe_total
+        FROM contracts.main.refined_contracts
+        WHERE contract_id IN ({placeholders})
+    """, list(scores)).fetchall()
+    return sorted(((row[0], scores[row[0]], *row[1:]) for row in rows), key=lambda row: row[1], reverse=True)
+
+def _ilike_contracts(con, query: str, limit: int = 20) -> list[tuple]:
+    """
+    The scan the search index replaces: every query word must appear in the title, awardee or contracting authority.
+    Matches are ranked before the limit is applied, so like search_contracts it has to find every match.
+    """
+    words = query.split()
+    if not words:
+        return []
+
+    conditions = " AND ".join("(titulo_del_contrato ILIKE ? OR adjudicatario ILIKE ? OR adjudicador ILIKE ?)" for _ in words)
+    params = [f"%{word}%" for word in words for _ in range(3)]
+    return con.execute(
+        f"SELECT contract_id FROM contracts.main.refined_contracts WHERE {conditions} ORDER BY importe_total DESC LIMIT ?", params + [limit]
+    ).fetchall()
+
+def benchmark(con, queries=BENCHMARK_QUERIES, repeat: int = 10):
+    """Prints the median and worst latency and the number of hits of the search index and of the equivalent ILIKE scan for each query."""
+    print(f"{'query':<35} {'index p50':>10} {'index max':>10} {'hits':>6} {'ilike p50':>10} {'ilike max':>10} {'hits':>6}")
+    for query in queries:
+        timings = {}
+        hits = {}
+        for name, search in (("index", search_contracts), ("ilike", _ilike_contracts)):
+            samples = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                results = search(con, query)
+                samples.append((time.perf_counter() - start) * 1000)
+            timings[name] = samples
+            hits[name] = len(results)
+        print(f"{query:<35} {statistics.median(timings['index']):>8.2f}ms {max(timings['index']):>8.2f}ms {hits['index']:>6} "
+              f"{statistics.median(timings['ilike']):>8.2f}ms {max(timings['ilike']):>8.2f}ms {hits['ilike']:>6}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Search contracts by keyword using the search index built by create_search_index.")
+    parser.add_argument("query", nargs="?", help="Keywords to search for in contract titles, awardees and contracting authorities")
+    parser.add_argument("--limit", type=int, default=20, help="Maximum number of results (default: 20)")
+    parser.add_argument("--any", action="store_true", help="Return contracts matching any of the keywords instead of all of them")
+    parser.add_argument("--benchmark", action="store_true", help="Measure search latency against ILIKE scans for a fixed set of queries")
+    parser.add_argument("--repeat", type=int, default=10, help="Runs per query when benchmarking (default: 10)")
+    args = parser.parse_args()
+
+    if not args.query and not args.benchmark:
+        parser.error("a query is required unless --benchmark is given")
+
+    con = duckdb.connect(database=DATABASE_PATH, read_only=True)
+    try:
+        try:
+            load_search_tokenizer(con)
+        except SearchTokenizerUnavailableError as e:
+            print(f"Error: {e}")
+            return
+        if args.benchmark:
+            benchmark(con, [args.query] if args.query else BENCHMARK_QUERIES, args.repeat)
+            return
+        for contract_id, score, titulo, adjudicatario, adjudicador, fecha, importe in search_contracts(con, args.query, args.limit, not args.any):
+            print(f"{score:6.2f}  {fecha}  {importe:>14,.2f}  {titulo} | {adjudicatario} | {adjudicador}")
+    finally:
+        con.close()
+
+if __name__ == "__main__":
+    main()
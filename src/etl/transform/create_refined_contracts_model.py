@@ -1,36 +1,133 @@
+import argparse
 import duckdb
 import os
+import re
+import time
 from src.etl.config import OUTPUT_DIR, DATABASE_NAME
+from src.etl.transform.options import add_refined_arguments
 
 SQL_FILENAME = "refined_contracts.sql"
+FFILL_SQL_FILENAME = "refined_contracts_ffill.sql"
 
 DATABASE_PATH = os.path.join(OUTPUT_DIR, DATABASE_NAME)
 
-def main():
+# Extracted files are named contracts_YYYY-MM[-partN[-dayN]].csv (see backfill_by_month)
+FILENAME_YEAR_PATTERN = re.compile(r"contracts_(\d{4})-")
+
+def read_sql_file(sql_filename):
+    """Reads a SQL file located next to this script. Returns None if it is missing or empty."""
+    script_dir = os.path.dirname(__file__)
+    actual_sql_file_path = os.path.join(script_dir, sql_filename)
     try:
-        script_dir = os.path.dirname(__file__)
-        actual_sql_file_path = os.path.join(script_dir, SQL_FILENAME)
         with open(actual_sql_file_path, 'r') as f:
-            full_sql_statement = f.read()
+            sql_statement = f.read()
     except FileNotFoundError:
         print(f"Error: SQL file not found at {actual_sql_file_path}")
-        return
+        return None
     except Exception as e:
         print(f"Error reading SQL file: {e}")
-        return
+        return None
 
-    if not full_sql_statement.strip():
+    if not sql_statement.strip():
         print(f"Error: SQL file {actual_sql_file_path} is empty.")
-        return
+        return None
+    return sql_statement
+
+def configure_session(con, memory_limit=None, threads=None, temp_directory=None):
+    """Applies the memory, thread and spill-to-disk budgets to the DuckDB session."""
+    if memory_limit:
+        con.execute("SET memory_limit = '" + memory_limit.replace("'", "''") + "'")
+    if threads:
+        con.execute(f"SET threads = {int(threads)}")
+    if temp_directory:
+        os.makedirs(temp_directory, exist_ok=True)
+        con.execute("SET temp_directory = '" + temp_directory.replace("'", "''") + "'")
+    settings = con.execute(
+        "SELECT current_setting('memory_limit'), current_setting('threads'), current_setting('temp_directory')"
+    ).fetchone()
+    print(f"DuckDB session: memory_limit={settings[0]}, threads={settings[1]}, temp_directory={settings[2] or '(none)'}")
+
+def plan_chunks(con, chunk_by="none", files_per_chunk=12):
+    """
+    Groups the raw CSV files into batches for the forward-fill stage.
+    Returns a list of (label, filenames) tuples; filenames is None for a single pass over all files.
+    """
+    if chunk_by == "none":
+        return [("all files", None)]
+
+    filenames = [row[0] for row in con.execute(
+        "SELECT DISTINCT filename FROM contracts.main.raw_contracts ORDER BY filename"
+    ).fetchall()]
 
+    if chunk_by == "year":
+        files_by_year = {}
+        for filename in filenames:
+            match = FILENAME_YEAR_PATTERN.search(os.path.basename(filename))
+            year = match.group(1) if match else "unknown year"
+            files_by_year.setdefault(year, []).append(filename)
+        return [(year, files) for year, files in sorted(files_by_year.items())]
+
+    files_per_chunk = max(1, files_per_chunk)
+    return [
+        (f"files {i + 1}-{min(i + files_per_chunk, len(filenames))} of {len(filenames)}", filenames[i:i + files_per_chunk])
+        for i in range(0, len(filenames), files_per_chunk)
+    ]
+
+def build_forward_filled_rows(con, ffill_sql, chunks):
+    """Runs the forward-fill stage once per chunk, appending into the refined_contracts_ffill temp table."""
+    con.execute("CREATE OR REPLACE TEMP VIEW refined_contracts_input AS SELECT * FROM contracts.main.raw_contracts")
+    con.execute(f"CREATE OR REPLACE TEMP TABLE refined_contracts_ffill AS {ffill_sql} LIMIT 0")
+
+    for index, (label, filenames) in enumerate(chunks, 1):
+        start = time.perf_counter()
+        if filenames is None:
+            input_sql = "SELECT * FROM contracts.main.raw_contracts"
+        else:
+            # Literal filenames let DuckDB skip the CSV files outside the chunk
+            quoted = ", ".join("'" + filename.replace("'", "''") + "'" for filename in filenames)
+            input_sql = f"SELECT * FROM contracts.main.raw_contracts WHERE filename IN ({quoted})"
+        con.execute(f"CREATE OR REPLACE TEMP VIEW refined_contracts_input AS {input_sql}")
+        row_count = con.execute(f"INSERT INTO refined_contracts_ffill {ffill_sql}").fetchone()[0]
+        print(f"[{index}/{len(chunks)}] Forward-filled {row_count} rows from {label} in {time.perf_counter() - start:.2f}s")
+
+    con.execute("DROP VIEW refined_contracts_input")
+
+def build_refined_contracts_model(con, chunk_by="none", files_per_chunk=12):
+    """
+    Builds the dimension tables, fact_contracts and the refined_contracts view on an open DuckDB connection
+    that already has the raw_contracts view. Errors are raised to the caller.
+    """
+    ffill_sql = read_sql_file(FFILL_SQL_FILENAME)
+    full_sql_statement = read_sql_file(SQL_FILENAME)
+    if ffill_sql is None or full_sql_statement is None:
+        raise RuntimeError("the refined contracts SQL files could not be read")
+    ffill_sql = ffill_sql.strip().rstrip(";")
+
+    # Earlier versions materialized refined_contracts as a table; it is now a view over fact_contracts
+    is_legacy_table = con.execute(
+        "SELECT COUNT(*) FROM duckdb_tables() WHERE schema_name = 'main' AND table_name = 'refined_contracts'"
+    ).fetchone()[0]
+    if is_legacy_table:
+        print("Dropping legacy table contracts.main.refined_contracts to replace it with a view...")
+        con.execute("DROP TABLE contracts.main.refined_contracts")
+
+    chunks = plan_chunks(con, chunk_by, files_per_chunk)
+    print(f"Forward-filling raw contracts in {len(chunks)} chunk(s) (chunk by: {chunk_by})...")
+    build_forward_filled_rows(con, ffill_sql, chunks)
+
+    start = time.perf_counter()
+    print(f"Executing SQL from {SQL_FILENAME} to create/replace view contracts.main.refined_contracts...")
+    con.execute(full_sql_statement)
+    print(f"Dimension tables, fact_contracts and view contracts.main.refined_contracts created/updated successfully in {DATABASE_PATH} ({time.perf_counter() - start:.2f}s).")
+
+def main(chunk_by="none", files_per_chunk=12, memory_limit=None, threads=None, temp_directory=None):
     try:
         os.makedirs(OUTPUT_DIR, exist_ok=True)
         con = duckdb.connect(database=DATABASE_PATH, read_only=False)
         print(f"Successfully connected to local DuckDB database at {DATABASE_PATH}.")
+        configure_session(con, memory_limit, threads, temp_directory)
 
-        print(f"Executing full SQL from {actual_sql_file_path} to create/replace view contracts.main.refined_contracts...")
-        con.execute(full_sql_statement)
-        print(f"View contracts.main.refined_contracts created/updated successfully in {DATABASE_PATH}.")
+        build_refined_contracts_model(con, chunk_by, files_per_chunk)
 
         con.close()
         print("Process completed.")
@@ -46,5 +143,11 @@ def main():
     except Exception as e:
         print(f"An unexpected error occurred: {e}")
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build the refined contracts model from the raw_contracts view.")
+    add_refined_arguments(parser)
+    return parser.parse_args(argv)
+
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    args = parse_args()
+    main(args.chunk_by, args.files_per_chunk, args.memory_limit, args.threads, args.temp_directory)
@@ -0,0 +1,79 @@
+import duckdb
+import os
+import time
+from src.etl.config import OUTPUT_DIR, DATABASE_NAME
+from src.etl.transform.create_refined_contracts_model import read_sql_file
+
+TOKENIZE_SQL_FILENAME = "search_tokenize.sql"
+SQL_FILENAME = "search_index.sql"
+
+DATABASE_PATH = os.path.join(OUTPUT_DIR, DATABASE_NAME)
+
+class SearchTokenizerUnavailableError(Exception):
+    """Raised when the fts extension, which provides the Snowball stemmer, cannot be installed or loaded."""
+
+def load_search_tokenizer(con):
+    """
+    Loads the fts extension (for its Snowball stem() function) and defines the search_tokenize macro
+    on the connection. Needed both to refresh the index and to query it.
+    """
+    try:
+        con.install_extension("fts")
+        con.load_extension("fts")
+    except duckdb.Error as e:
+        raise SearchTokenizerUnavailableError(f"the DuckDB fts extension could not be installed or loaded: {e}") from e
+    tokenize_sql = read_sql_file(TOKENIZE_SQL_FILENAME)
+    if tokenize_sql is None:
+        raise RuntimeError("the search tokenizer SQL file could not be read")
+    con.execute(tokenize_sql)
+
+def refresh_search_index(con):
+    """
+    Brings the search index tables in line with refined_contracts, re-tokenizing only new or changed contracts.
+    Expects load_search_tokenizer to have been called on the connection.
+    """
+    full_sql_statement = read_sql_file(SQL_FILENAME)
+    if full_sql_statement is None:
+        raise RuntimeError("the search index SQL file could not be read")
+
+    documents_before = 0
+    if con.execute(
+        "SELECT COUNT(*) FROM duckdb_tables() WHERE schema_name = 'main' AND table_name = 'search_documents'"
+    ).fetchone()[0]:
+        documents_before = con.execute("SELECT COUNT(*) FROM contracts.main.search_documents").fetchone()[0]
+
+    start = time.perf_counter()
+    con.execute(full_sql_statement)
+    documents_after, terms = con.execute(
+        "SELECT (SELECT COUNT(*) FROM contracts.main.search_documents), (SELECT COUNT(DISTINCT term) FROM contracts.main.search_postings)"
+    ).fetchone()
+    print(f"Search index refreshed in {time.perf_counter() - start:.2f}s: {documents_after} documents (was {documents_before}), {terms} distinct terms.")
+
+def main():
+    try:
+        os.makedirs(OUTPUT_DIR, exist_ok=True)
+        con = duckdb.connect(database=DATABASE_PATH, read_only=False)
+        print(f"Successfully connected to local DuckDB database at {DATABASE_PATH}.")
+
+        load_search_tokenizer(con)
+        print(f"Refreshing search index over contracts.main.refined_contracts from {SQL_FILENAME}...")
+        refresh_search_index(con)
+
+        con.close()
+        print("Process completed.")
+
+    except SearchTokenizerUnavailableError as e:
+        print(f"Skipping search index: {e}")
+    except duckdb.IOException as e:
+        if "Could not set lock on file" in str(e):
+            print(f"A DuckDB IO error occurred, likely due to a conflicting file lock: {e}")
+            print("Please ensure no other processes are using the database file and try again.")
+        else:
+            print(f"A DuckDB IO error occurred: {e}")
+    except duckdb.Error as e:
+        print(f"DuckDB database error: {e}")
+    except Exception as e:
+        print(f"An unexpected error occurred: {e}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+# Command line options of the refined model, kept free of DuckDB imports so the
+# pipeline CLI can build its parser without loading the transform modules.
+
+CHUNK_BY_CHOICES = ("none", "files", "year")
+
+def add_refined_arguments(parser):
+    """Adds the chunking and DuckDB budget options of the refined model to an argument parser."""
+    parser.add_argument("--chunk-by", choices=CHUNK_BY_CHOICES, default="none", help="Run the forward-fill stage in one pass ('none'), in batches of files ('files') or per contract year in the filename ('year') (default: none)")
+    parser.add_argument("--files-per-chunk", type=int, default=12, help="Number of CSV files per chunk when using --chunk-by files (default: 12)")
+    parser.add_argument("--memory-limit", help="DuckDB memory limit, e.g. '2GB' (default: DuckDB's own)")
+    parser.add_argument("--threads", type=int, help="Number of DuckDB threads (default: DuckDB's own)")
+    parser.add_argument("--temp-directory", help="Directory where DuckDB spills to disk when over the memory limit (default: DuckDB's own)")
@@ -1,166 +1,18 @@
-CREATE OR REPLACE TABLE contracts.main.refined_contracts AS
-WITH
--- Step 1: Select raw columns and identifiers needed for ordering and grouping
-raw_with_ids AS (
-    SELECT
-        filename,
-        row_number, -- Crucial for ordering
-        "Tipo de Publicación" AS tipo_de_publicacion_raw,
-        "Estado" AS estado_raw,
-        "Entidad Adjudicadora" AS entidad_adjudicadora_raw,
-        "Nº Expediente" AS no_expediente_raw,
-        "Referencia" AS referencia_raw,
-        "Título del contrato" AS titulo_del_contrato_raw, -- Key indicator for a new contract
-        "Tipo de contrato" AS tipo_de_contrato_raw,
-        "Procedimiento de adjudicación" AS procedimiento_de_adjudicacion_raw,
-        "Presupuesto de licitación" AS presupuesto_de_licitacion_raw,
-        "Nº de ofertas" AS no_de_ofertas_raw,
-        "Resultado" AS resultado_raw,
-        "NIF del adjudicatario" AS nif_del_adjudicatario_raw,
-        "Adjudicatario" AS adjudicatario_raw,
-        "Fecha del contrato" AS fecha_del_contrato_raw,
-        "Importe de adjudicación" AS importe_de_adjudicacion_raw,
-        "Importe de las modificaciones" AS importe_de_las_modificaciones_raw,
-        "Importe de las prórrogas" AS importe_de_las_prorrogas_raw,
-        "Importe de la liquidación" AS importe_de_la_liquidacion_raw
-    FROM contracts.main.raw_contracts
-),
--- Step 2: Apply parsing and type casting (logic similar to refined_contracts)
-parsed_and_typed AS (
-    SELECT
-        filename,
-        row_number,
-        titulo_del_contrato_raw, -- Retain for grouping logic
-
-        -- Columns that might be forward-filled (pre-fill versions)
-        tipo_de_publicacion_raw AS tipo_de_publicacion_pre_ffill,
-        estado_raw AS estado_pre_ffill,
-        split_part(entidad_adjudicadora_raw, '··>', 1) as adjudicador_raiz_pre_ffill,
-        COALESCE(
-          NULLIF(SPLIT_PART(entidad_adjudicadora_raw, '··>', 5),  ''),
-          NULLIF(SPLIT_PART(entidad_adjudicadora_raw, '··>', 4),  ''),
-          NULLIF(SPLIT_PART(entidad_adjudicadora_raw, '··>', 3),  ''),
-          NULLIF(SPLIT_PART(entidad_adjudicadora_raw, '··>', 2),  ''),
-          NULLIF(SPLIT_PART(entidad_adjudicadora_raw, '··>', 1),  '')
-        ) AS adjudicador_pre_ffill,
-        no_expediente_raw AS no_expediente_pre_ffill,
-        referencia_raw AS referencia_pre_ffill,
-        titulo_del_contrato_raw AS titulo_del_contrato_pre_ffill,
-        COALESCE(
-            NULLIF(
-                TRIM(
-                    CONCAT(
-                        UPPER(LEFT(tipo_de_contrato_raw, 1)),
-                        LOWER(SUBSTRING(tipo_de_contrato_raw, 2))
-                    )
-                ),
-                ''
-            ),
-            'Desconocido'
-        ) AS tipo_de_contrato_pre_ffill,
-        procedimiento_de_adjudicacion_raw AS procedimiento_de_adjudicacion_pre_ffill,
-        TRY_CAST(
-            REPLACE(
-                REPLACE(presupuesto_de_licitacion_raw, '.', ''),
-                ',',
-                '.'
-            ) AS DOUBLE
-        ) AS presupuesto_de_licitacion_pre_ffill,
-        TRY_CAST(no_de_ofertas_raw AS BIGINT) AS no_de_ofertas_pre_ffill,
-        resultado_raw AS resultado_pre_ffill,
-        CAST(
-            CASE
-                WHEN regexp_matches(fecha_del_contrato_raw, '[0-9]{1,2} de [a-zA-Z]+ del [0-9]{4}') THEN
-                    TRY_CAST(
-                        regexp_extract(fecha_del_contrato_raw, '([0-9]{4})$', 1) || '-' ||
-                        CASE LOWER(regexp_extract(fecha_del_contrato_raw, 'de ([a-zA-Z]+) del', 1))
-                            WHEN 'enero' THEN '01' WHEN 'Enero' THEN '01'
-                            WHEN 'febrero' THEN '02' WHEN 'Febrero' THEN '02'
-                            WHEN 'marzo' THEN '03' WHEN 'Marzo' THEN '03'
-                            WHEN 'abril' THEN '04' WHEN 'Abril' THEN '04'
-                            WHEN 'mayo' THEN '05' WHEN 'Mayo' THEN '05'
-                            WHEN 'junio' THEN '06' WHEN 'Junio' THEN '06'
-                            WHEN 'julio' THEN '07' WHEN 'Julio' THEN '07'
-                            WHEN 'agosto' THEN '08' WHEN 'Agosto' THEN '08'
-                            WHEN 'septiembre' THEN '09' WHEN 'Septiembre' THEN '09'
-                            WHEN 'octubre' THEN '10' WHEN 'Octubre' THEN '10'
-                            WHEN 'noviembre' THEN '11' WHEN 'Noviembre' THEN '11'
-                            WHEN 'diciembre' THEN '12' WHEN 'Diciembre' THEN '12'
-                            ELSE NULL
-                        END || '-' ||
-                        LPAD(regexp_extract(fecha_del_contrato_raw, '^([0-9]{1,2})', 1), 2, '0')
-                        AS DATE)
-                ELSE NULL
-            END
-        AS DATE) AS fecha_del_contrato_pre_ffill,
+-- Builds the refined contracts model as a star schema:
+--   * dim_* tables hold each distinct categorical value once, keyed by a persistent integer surrogate key
+--   * fact_contracts stores one row per contract/awardee with only the keys for those columns
+--   * the refined_contracts view joins them back together, keeping the original column names
+-- The dimension tables are never truncated, so surrogate keys stay stable across rebuilds.
+-- Expects the forward-filled rows in refined_contracts_ffill (built from refined_contracts_ffill.sql).
 
-        -- Columns specific to awardee (not forward-filled, but parsed)
-        TRIM(REGEXP_REPLACE(UPPER(nif_del_adjudicatario_raw), '[^A-Z0-9]', '')) AS nif_del_adjudicatario,
-        TRIM(REGEXP_REPLACE(REGEXP_REPLACE(UPPER(adjudicatario_raw), '\s+', ' '), ' 	', ' ')) AS adjudicatario,
-        TRY_CAST(REPLACE(REPLACE(importe_de_adjudicacion_raw, '.', ''), ',', '.') AS DOUBLE) AS importe_de_adjudicacion,
-        TRY_CAST(REPLACE(REPLACE(importe_de_las_modificaciones_raw, '.', ''), ',', '.') AS DOUBLE) AS importe_de_las_modificaciones,
-        TRY_CAST(REPLACE(REPLACE(importe_de_las_prorrogas_raw, '.', ''), ',', '.') AS DOUBLE) AS importe_de_las_prorrogas,
-        TRY_CAST(REPLACE(REPLACE(importe_de_la_liquidacion_raw, '.', ''), ',', '.') AS DOUBLE) AS importe_de_la_liquidacion
-    FROM raw_with_ids
-),
--- Step 3: Apply filter from refined_contracts and calculate importe_total
-total_added AS (
-    SELECT
-        *,
-        (COALESCE(importe_de_adjudicacion, 0) +
-         COALESCE(importe_de_las_modificaciones, 0) +
-         COALESCE(importe_de_las_prorrogas, 0) +
-         COALESCE(importe_de_la_liquidacion, 0)) AS importe_total
-    FROM parsed_and_typed
-),
--- Step 4: Create a contract group identifier within each file
--- A new group starts when `titulo_del_contrato_pre_ffill` (which is the original title) is non-NULL.
-grouped_for_ffill AS (
-    SELECT
-        *,
-        SUM(CASE WHEN titulo_del_contrato_pre_ffill IS NOT NULL THEN 1 ELSE 0 END) OVER (PARTITION BY filename ORDER BY row_number ASC ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW) AS contract_group_id
-    FROM total_added
-),
--- Step 5: Apply forward fill
-forward_filled_data AS (
-    SELECT
-        -- Forward-filled columns (final versions)
-        LAST_VALUE(tipo_de_publicacion_pre_ffill IGNORE NULLS) OVER (PARTITION BY filename, contract_group_id ORDER BY row_number ASC ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW) AS tipo_de_publicacion,
-        LAST_VALUE(estado_pre_ffill IGNORE NULLS) OVER (PARTITION BY filename, contract_group_id ORDER BY row_number ASC ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW) AS estado,
-        LAST_VALUE(adjudicador_raiz_pre_ffill IGNORE NULLS) OVER (PARTITION BY filename, contract_group_id ORDER BY row_number ASC ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW) AS adjudicador_raiz,
-        LAST_VALUE(adjudicador_pre_ffill IGNORE NULLS) OVER (PARTITION BY filename, contract_group_id ORDER BY row_number ASC ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW) AS adjudicador,
-        LAST_VALUE(no_expediente_pre_ffill IGNORE NULLS) OVER (PARTITION BY filename, contract_group_id ORDER BY row_number ASC ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW) AS no_expediente,
-        LAST_VALUE(referencia_pre_ffill IGNORE NULLS) OVER (PARTITION BY filename, contract_group_id ORDER BY row_number ASC ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW) AS referencia,
-        LAST_VALUE(titulo_del_contrato_pre_ffill IGNORE NULLS) OVER (PARTITION BY filename, contract_group_id ORDER BY row_number ASC ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW) AS titulo_del_contrato,
-        LAST_VALUE(tipo_de_contrato_pre_ffill IGNORE NULLS) OVER (PARTITION BY filename, contract_group_id ORDER BY row_number ASC ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW) AS tipo_de_contrato,
-        LAST_VALUE(procedimiento_de_adjudicacion_pre_ffill IGNORE NULLS) OVER (PARTITION BY filename, contract_group_id ORDER BY row_number ASC ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW) AS procedimiento_de_adjudicacion,
-        LAST_VALUE(presupuesto_de_licitacion_pre_ffill IGNORE NULLS) OVER (PARTITION BY filename, contract_group_id ORDER BY row_number ASC ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW) AS presupuesto_de_licitacion,
-        LAST_VALUE(no_de_ofertas_pre_ffill IGNORE NULLS) OVER (PARTITION BY filename, contract_group_id ORDER BY row_number ASC ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW) AS no_de_ofertas,
-        LAST_VALUE(resultado_pre_ffill IGNORE NULLS) OVER (PARTITION BY filename, contract_group_id ORDER BY row_number ASC ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW) AS resultado,
-        LAST_VALUE(fecha_del_contrato_pre_ffill IGNORE NULLS) OVER (PARTITION BY filename, contract_group_id ORDER BY row_number ASC ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW) AS fecha_del_contrato,
-
-        -- Columns not forward-filled (awardee specific)
-        nif_del_adjudicatario,
-        adjudicatario,
-        importe_de_adjudicacion,
-        importe_de_las_modificaciones,
-        importe_de_las_prorrogas,
-        importe_de_la_liquidacion,
-        importe_total,
-        
-        -- Optionally, include these for verification, but they shouldn't be part of the final view's public interface
-        filename,
-        row_number,
-        -- contract_group_id
-
-    FROM grouped_for_ffill
-),
+CREATE OR REPLACE TEMP TABLE refined_contracts_staging AS
+WITH
 -- Step 6: Add lote column
 data_with_lote AS (
     SELECT
         * EXCLUDE (filename, row_number),
         row_number() OVER (PARTITION BY no_expediente, referencia, titulo_del_contrato ORDER BY filename, row_number) as lote
-    FROM forward_filled_data
+    FROM refined_contracts_ffill
 ),
 -- Step 8: Normalize contract types
 normalized_contract_types AS (
@@ -183,4 +35,146 @@ FROM normalized_contract_types
 
 WHERE importe_total IS NOT NULL AND importe_total != 0 AND fecha_del_contrato IS NOT NULL
 AND fecha_del_contrato >= '2021-01-01'
-; 
\ No newline at end of file
+;
+
+-- Step 10: Dimension tables with persistent surrogate keys
+CREATE SEQUENCE IF NOT EXISTS contracts.main.dim_adjudicador_seq;
+CREATE TABLE IF NOT EXISTS contracts.main.dim_adjudicador (
+    adjudicador_id INTEGER PRIMARY KEY DEFAULT nextval('contracts.main.dim_adjudicador_seq'),
+    entidad_adjudicadora VARCHAR NOT NULL, -- Full '··>' path as published
+    jerarquia VARCHAR[], -- Non-empty levels of the path, root first
+    adjudicador_raiz VARCHAR,
+    adjudicador VARCHAR -- Deepest non-empty level among the first five
+);
+
+CREATE SEQUENCE IF NOT EXISTS contracts.main.dim_adjudicatario_seq;
+CREATE TABLE IF NOT EXISTS contracts.main.dim_adjudicatario (
+    adjudicatario_id INTEGER PRIMARY KEY DEFAULT nextval('contracts.main.dim_adjudicatario_seq'),
+    adjudicatario VARCHAR NOT NULL
+);
+
+CREATE SEQUENCE IF NOT EXISTS contracts.main.dim_tipo_de_publicacion_seq;
+CREATE TABLE IF NOT EXISTS contracts.main.dim_tipo_de_publicacion (
+    tipo_de_publicacion_id INTEGER PRIMARY KEY DEFAULT nextval('contracts.main.dim_tipo_de_publicacion_seq'),
+    tipo_de_publicacion VARCHAR NOT NULL
+);
+
+CREATE SEQUENCE IF NOT EXISTS contracts.main.dim_procedimiento_de_adjudicacion_seq;
+CREATE TABLE IF NOT EXISTS contracts.main.dim_procedimiento_de_adjudicacion (
+    procedimiento_de_adjudicacion_id INTEGER PRIMARY KEY DEFAULT nextval('contracts.main.dim_procedimiento_de_adjudicacion_seq'),
+    procedimiento_de_adjudicacion VARCHAR NOT NULL
+);
+
+CREATE SEQUENCE IF NOT EXISTS contracts.main.dim_estado_seq;
+CREATE TABLE IF NOT EXISTS contracts.main.dim_estado (
+    estado_id INTEGER PRIMARY KEY DEFAULT nextval('contracts.main.dim_estado_seq'),
+    estado VARCHAR NOT NULL
+);
+
+-- Step 11: Register values not seen in previous runs
+INSERT INTO contracts.main.dim_adjudicador (entidad_adjudicadora, jerarquia, adjudicador_raiz, adjudicador)
+SELECT
+    entidad_adjudicadora,
+    list_filter(niveles, x -> x <> '') AS jerarquia,
+    niveles[1] AS adjudicador_raiz,
+    list_filter(niveles[1:5], x -> x <> '')[-1] AS adjudicador
+FROM (
+    SELECT entidad_adjudicadora, string_split(entidad_adjudicadora, '··>') AS niveles
+    FROM (SELECT DISTINCT entidad_adjudicadora FROM refined_contracts_staging WHERE entidad_adjudicadora IS NOT NULL)
+    WHERE entidad_adjudicadora NOT IN (SELECT entidad_adjudicadora FROM contracts.main.dim_adjudicador)
+)
+ORDER BY entidad_adjudicadora;
+
+INSERT INTO contracts.main.dim_adjudicatario (adjudicatario)
+SELECT DISTINCT adjudicatario FROM refined_contracts_staging
+WHERE adjudicatario IS NOT NULL
+  AND adjudicatario NOT IN (SELECT adjudicatario FROM contracts.main.dim_adjudicatario)
+ORDER BY adjudicatario;
+
+INSERT INTO contracts.main.dim_tipo_de_publicacion (tipo_de_publicacion)
+SELECT DISTINCT tipo_de_publicacion FROM refined_contracts_staging
+WHERE tipo_de_publicacion IS NOT NULL
+  AND tipo_de_publicacion NOT IN (SELECT tipo_de_publicacion FROM contracts.main.dim_tipo_de_publicacion)
+ORDER BY tipo_de_publicacion;
+
+INSERT INTO contracts.main.dim_procedimiento_de_adjudicacion (procedimiento_de_adjudicacion)
+SELECT DISTINCT procedimiento_de_adjudicacion FROM refined_contracts_staging
+WHERE procedimiento_de_adjudicacion IS NOT NULL
+  AND procedimiento_de_adjudicacion NOT IN (SELECT procedimiento_de_adjudicacion FROM contracts.main.dim_procedimiento_de_adjudicacion)
+ORDER BY procedimiento_de_adjudicacion;
+
+INSERT INTO contracts.main.dim_estado (estado)
+SELECT DISTINCT estado FROM refined_contracts_staging
+WHERE estado IS NOT NULL
+  AND estado NOT IN (SELECT estado FROM contracts.main.dim_estado)
+ORDER BY estado;
+
+-- Step 12: Fact table storing only the surrogate keys for the dictionary-encoded columns
+CREATE OR REPLACE TABLE contracts.main.fact_contracts AS
+SELECT
+    tp.tipo_de_publicacion_id,
+    e.estado_id,
+    ad.adjudicador_id,
+    s.no_expediente,
+    s.referencia,
+    s.titulo_del_contrato,
+    pa.procedimiento_de_adjudicacion_id,
+    s.presupuesto_de_licitacion,
+    s.no_de_ofertas,
+    s.resultado,
+    s.fecha_del_contrato,
+    s.nif_del_adjudicatario,
+    aa.adjudicatario_id,
+    s.importe_de_adjudicacion,
+    s.importe_de_las_modificaciones,
+    s.importe_de_las_prorrogas,
+    s.importe_de_la_liquidacion,
+    s.importe_total,
+    s.lote,
+    s.tipo_de_contrato_normalized,
+    s.tipo_de_contrato,
+    s.contract_id
+FROM refined_contracts_staging s
+LEFT JOIN contracts.main.dim_tipo_de_publicacion tp ON s.tipo_de_publicacion = tp.tipo_de_publicacion
+LEFT JOIN contracts.main.dim_estado e ON s.estado = e.estado
+LEFT JOIN contracts.main.dim_adjudicador ad ON s.entidad_adjudicadora = ad.entidad_adjudicadora
+LEFT JOIN contracts.main.dim_procedimiento_de_adjudicacion pa ON s.procedimiento_de_adjudicacion = pa.procedimiento_de_adjudicacion
+LEFT JOIN contracts.main.dim_adjudicatario aa ON s.adjudicatario = aa.adjudicatario
+ORDER BY s.fecha_del_contrato;
+
+DROP TABLE refined_contracts_staging;
+DROP TABLE refined_contracts_ffill;
+
+-- Step 13: Compatibility view exposing the original refined_contracts columns.
+-- Tables are referenced without a catalog so the view binds to its own database under any attached name.
+CREATE OR REPLACE VIEW contracts.main.refined_contracts AS
+SELECT
+    tp.tipo_de_publicacion,
+    e.estado,
+    ad.adjudicador_raiz,
+    ad.adjudicador,
+    f.no_expediente,
+    f.referencia,
+    f.titulo_del_contrato,
+    pa.procedimiento_de_adjudicacion,
+    f.presupuesto_de_licitacion,
+    f.no_de_ofertas,
+    f.resultado,
+    f.fecha_del_contrato,
+    f.nif_del_adjudicatario,
+    aa.adjudicatario,
+    f.importe_de_adjudicacion,
+    f.importe_de_las_modificaciones,
+    f.importe_de_las_prorrogas,
+    f.importe_de_la_liquidacion,
+    f.importe_total,
+    f.lote,
+    f.tipo_de_contrato_normalized,
+    f.tipo_de_contrato,
+    f.contract_id
+FROM fact_contracts f
+LEFT JOIN dim_tipo_de_publicacion tp USING (tipo_de_publicacion_id)
+LEFT JOIN dim_estado e USING (estado_id)
+LEFT JOIN dim_adjudicador ad USING (adjudicador_id)
+LEFT JOIN dim_procedimiento_de_adjudicacion pa USING (procedimiento_de_adjudicacion_id)
+LEFT JOIN dim_adjudicatario aa USING (adjudicatario_id);
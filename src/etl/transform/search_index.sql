@@ -0,0 +1,78 @@
+-- Inverted index over the contract title, awardee and contracting authority of refined_contracts.
+-- Refreshed incrementally: only documents whose text changed since the previous run are re-tokenized.
+-- Expects the search_tokenize and search_tokenizer_version macros (search_tokenize.sql).
+
+-- Step 1: Index tables
+CREATE TABLE IF NOT EXISTS contracts.main.search_documents (
+    contract_id VARCHAR NOT NULL,
+    document_hash VARCHAR NOT NULL, -- md5 of the tokenizer version and the indexed text, to detect changed documents
+    num_terms INTEGER NOT NULL -- Document length used by BM25
+);
+
+CREATE TABLE IF NOT EXISTS contracts.main.search_postings (
+    term VARCHAR NOT NULL,
+    contract_id VARCHAR NOT NULL,
+    tf INTEGER NOT NULL, -- Occurrences of the term in the document
+    num_terms INTEGER NOT NULL -- Length of the document, copied here so scoring needs no join
+);
+
+-- Step 2: Current documents
+CREATE OR REPLACE TEMP TABLE search_source AS
+SELECT DISTINCT ON (contract_id)
+    contract_id,
+    md5(concat_ws('|', search_tokenizer_version(), COALESCE(titulo_del_contrato, ''), COALESCE(adjudicatario, ''), COALESCE(adjudicador, ''))) AS document_hash,
+    concat_ws(' ', titulo_del_contrato, adjudicatario, adjudicador) AS document
+FROM contracts.main.refined_contracts;
+
+-- Step 3: Remove documents that disappeared or changed
+CREATE OR REPLACE TEMP TABLE search_stale AS
+SELECT contract_id, document_hash FROM contracts.main.search_documents
+ANTI JOIN search_source USING (contract_id, document_hash);
+
+DELETE FROM contracts.main.search_postings WHERE contract_id IN (SELECT contract_id FROM search_stale);
+DELETE FROM contracts.main.search_documents WHERE contract_id IN (SELECT contract_id FROM search_stale);
+
+-- Step 4: Tokenize and add new or changed documents
+CREATE OR REPLACE TEMP TABLE search_new AS
+SELECT contract_id, document_hash, search_tokenize(document) AS terms
+FROM search_source
+ANTI JOIN contracts.main.search_documents USING (contract_id);
+
+INSERT INTO contracts.main.search_postings
+SELECT term, contract_id, COUNT(*)::INTEGER AS tf, ANY_VALUE(num_terms) AS num_terms
+FROM (SELECT contract_id, len(terms)::INTEGER AS num_terms, UNNEST(terms) AS term FROM search_new)
+GROUP BY term, contract_id
+ORDER BY term;
+
+INSERT INTO contracts.main.search_documents
+SELECT contract_id, document_hash, len(terms)::INTEGER AS num_terms
+FROM search_new;
+
+DROP TABLE search_source;
+DROP TABLE search_stale;
+DROP TABLE search_new;
+
+-- Step 5: Collection statistics for BM25
+CREATE OR REPLACE TABLE contracts.main.search_terms AS
+SELECT term, COUNT(*) AS df
+FROM contracts.main.search_postings
+GROUP BY term
+ORDER BY term;
+
+CREATE OR REPLACE TABLE contracts.main.search_index_stats AS
+SELECT COUNT(*) AS num_documents, AVG(num_terms) AS avg_num_terms
+FROM contracts.main.search_documents;
+
+-- Step 6: BM25 weight of every term in every document (k1 = 1.2, b = 0.75, as in DuckDB's fts extension).
+-- The score of a document for a query is the sum of the weights of the query terms it contains.
+-- Tables are unqualified for the reason given in refined_contracts.sql Step 13.
+CREATE OR REPLACE VIEW contracts.main.search_term_weights AS
+SELECT
+    p.term,
+    p.contract_id,
+    LN(1 + (s.num_documents - t.df + 0.5) / (t.df + 0.5))
+        * p.tf * (1.2 + 1)
+        / (p.tf + 1.2 * (1 - 0.75 + 0.75 * p.num_terms / s.avg_num_terms)) AS peso
+FROM search_postings p
+JOIN search_terms t USING (term)
+CROSS JOIN search_index_stats s;
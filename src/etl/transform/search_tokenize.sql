@@ -0,0 +1,20 @@
+-- Turns free text into search terms: lower-cased, unaccented words split on anything that is not a letter or digit,
+-- without one-letter words and Spanish stopwords, reduced with the Snowball Spanish stemmer (stem() from the fts extension).
+-- Accents are folded before stemming so that accented and unaccented spellings reduce to the same stem.
+-- Used both to build the search index and to tokenize queries, so both sides match.
+CREATE OR REPLACE TEMP MACRO search_tokenize(text) AS
+    list_transform(
+        list_filter(
+            regexp_split_to_array(strip_accents(lower(text)), '[^\p{L}\p{N}]+'),
+            word -> length(word) > 1 AND NOT list_contains(
+                ['de', 'la', 'el', 'los', 'las', 'del', 'al', 'en', 'por', 'para', 'con', 'sin', 'un', 'una',
+                 'unos', 'unas', 'que', 'se', 'su', 'sus', 'lo', 'le', 'les', 'y', 'o', 'e', 'u', 'a'],
+                word
+            )
+        ),
+        word -> stem(word, 'spanish')
+    );
+
+-- Part of every document hash in the search index: bump it whenever search_tokenize changes
+-- so the next refresh re-tokenizes every document.
+CREATE OR REPLACE TEMP MACRO search_tokenizer_version() AS 'v2';